@@ -4,7 +4,7 @@ import os
 from flask import Flask
 from werkzeug.middleware.proxy_fix import ProxyFix
 
-from extensions import db, login_manager
+from extensions import db, login_manager, login_limiter
 
 
 def create_app(test_config=None):
@@ -12,7 +12,11 @@ def create_app(test_config=None):
     # create the app
     app = Flask(__name__)
     app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key")
-    app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)  # needed for url_for to generate with https
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1)  # needed for url_for to generate with https and for per-IP login limits
+
+    # "eager" checks the database and migrates the schema at boot; "lazy" defers both to first use
+    app.config["STARTUP_MODE"] = os.environ.get("STARTUP_MODE", "eager")
+    connect_timeout = int(os.environ.get("DB_CONNECT_TIMEOUT", 5))
 
     # configure the database with SQLite fallback
     database_url = os.environ.get("DATABASE_URL")
@@ -29,25 +33,48 @@ def create_app(test_config=None):
     
     # Only try to use PostgreSQL if DATABASE_URL is provided
     if database_url:
-        try:
-            import psycopg2
-            # Test connection
-            psycopg2.connect(database_url)
-            # If we get here, the connection was successful
+        postgres_options = {
+            "pool_recycle": 300,
+            "pool_pre_ping": True,
+            "connect_args": {"connect_timeout": connect_timeout},
+        }
+        if app.config["STARTUP_MODE"] == "lazy":
+            # No fallback in lazy mode: the first request reports an unreachable database
             app.config["SQLALCHEMY_DATABASE_URI"] = database_url
-            app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-                "pool_recycle": 300,
-                "pool_pre_ping": True,
-            }
-            print("Using PostgreSQL database")
-        except Exception as e:
-            print(f"Failed to connect to PostgreSQL, falling back to SQLite: {e}")
+            app.config["SQLALCHEMY_ENGINE_OPTIONS"] = postgres_options
+            print("Using PostgreSQL database, connection checked on first use")
+        else:
+            try:
+                import psycopg2
+                # Test connection
+                psycopg2.connect(database_url, connect_timeout=connect_timeout).close()
+                # If we get here, the connection was successful
+                app.config["SQLALCHEMY_DATABASE_URI"] = database_url
+                app.config["SQLALCHEMY_ENGINE_OPTIONS"] = postgres_options
+                print("Using PostgreSQL database")
+            except Exception as e:
+                print(f"Failed to connect to PostgreSQL, falling back to SQLite: {e}")
     else:
         print("DATABASE_URL not provided, using SQLite database")
 
+    # seconds between recurring expense materialization runs; 0 disables the scheduler
+    app.config["RECURRING_INTERVAL"] = int(os.environ.get("RECURRING_INTERVAL", 300))
+
+    # password hashing cost and the per-worker process pool that runs it; 0 workers hashes inline
+    app.config["PASSWORD_HASH_METHOD"] = os.environ.get("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    app.config["PASSWORD_HASH_WORKERS"] = int(os.environ.get("PASSWORD_HASH_WORKERS", 1))
+    app.config["PASSWORD_HASH_QUEUE"] = int(os.environ.get("PASSWORD_HASH_QUEUE", 1))
+    app.config["PASSWORD_HASH_NICE"] = int(os.environ.get("PASSWORD_HASH_NICE", 10))
+    app.config["PASSWORD_HASH_TIMEOUT"] = float(os.environ.get("PASSWORD_HASH_TIMEOUT", 5))
+
+    # apply any overrides passed in, e.g. by tests or benchmarks
+    if test_config:
+        app.config.from_mapping(test_config)
+
     # initialize extensions
     db.init_app(app)
     login_manager.init_app(app)
+    login_limiter.init_app(app)
 
     @login_manager.user_loader
     def load_user(user_id):
@@ -59,8 +86,24 @@ def create_app(test_config=None):
     from routes import main_bp
     app.register_blueprint(main_bp)
 
-    # ensure database tables exist
+    # serve built static assets and compress large API responses
+    import assets
+    assets.init_app(app)
+
+    # send non-ASCII text such as ₹ as-is rather than as \u escapes
+    app.json.ensure_ascii = False
+
+    # check the database schema now, or on first use in lazy mode
+    import schema
+    schema.init_app(app)
     with app.app_context():
-        db.create_all()
+        if app.config["STARTUP_MODE"] == "lazy":
+            schema.check_on_first_connect()
+        else:
+            schema.migrate_if_needed()
+
+    # materialize recurring expenses in the background
+    import recurring
+    recurring.init_app(app)
 
     return app
\ No newline at end of file
@@ -0,0 +1,237 @@
+"""Static assets module.
+
+This module builds minified, content-hashed and pre-compressed copies of
+the app's own CSS and JavaScript into static/dist (`python -m assets`, which
+needs no database), and serves them with far-future immutable cache
+headers. Templates keep calling url_for('static', filename=...); the build
+manifest rewrites those URLs to the hashed files. It also compresses large /api/* and export responses on
+the fly, with brotli or gzip depending on what the client accepts.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+
+import brotli
+from flask import request, send_from_directory
+
+# Source files under static/ that the build step processes
+ASSETS = ['css/styles.css', 'js/main.js', 'js/charts.js']
+
+# Folder under static/ that receives the built files and manifest
+DIST_FOLDER = 'dist'
+MANIFEST_NAME = 'manifest.json'
+
+# Cache lifetime for hashed files, which never change under the same name
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+MIMETYPES = {'.css': 'text/css', '.js': 'text/javascript'}
+
+
+def digest(data):
+    """Return a short content hash of data."""
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def minify_css(source):
+    """Strip comments and redundant whitespace from a stylesheet."""
+    source = re.sub(r'/\*.*?\*/', '', source, flags=re.S)
+    source = re.sub(r'\s+', ' ', source)
+    source = re.sub(r'\s*([{};,>])\s*', r'\1', source)
+    source = source.replace(';}', '}')
+    return source.strip()
+
+
+def minify_js(source):
+    """Strip comments, indentation and blank lines from a script.
+
+    Each line is scanned for string, template literal and comment
+    boundaries, so strings and template literals, including lines inside a
+    multi-line template, are copied unchanged. Line breaks are kept, so
+    automatic semicolon insertion is unaffected. Regular expression literals
+    and templates nested inside ${...} are not recognized; the app's scripts
+    contain neither.
+    """
+    lines = []
+    state = None  # '`' inside a template literal, '*' inside a block comment
+    for line in source.splitlines():
+        starts_in_template = state == '`'
+        out = []
+        i = 0
+        while i < len(line):
+            if state == '*':
+                end = line.find('*/', i)
+                if end < 0:
+                    break
+                # a comment between two tokens still separates them
+                out.append(' ')
+                state = None
+                i = end + 2
+            elif state == '`' or line[i] in '\'"':
+                quote = '`' if state == '`' else line[i]
+                j = i if state == '`' else i + 1
+                while j < len(line) and line[j] != quote:
+                    j += 2 if line[j] == '\\' else 1
+                out.append(line[i:j + 1])
+                # only a template literal may continue on the next line
+                state = '`' if quote == '`' and j >= len(line) else None
+                i = j + 1
+            elif line[i] == '`':
+                out.append('`')
+                state = '`'
+                i += 1
+            elif line.startswith('//', i):
+                break
+            elif line.startswith('/*', i):
+                state = '*'
+                i += 2
+            else:
+                out.append(line[i])
+                i += 1
+
+        text = ''.join(out)
+        if not starts_in_template:
+            text = text.lstrip()
+        if state != '`':
+            text = text.rstrip()
+        if text or starts_in_template:
+            lines.append(text)
+    return '\n'.join(lines) + '\n'
+
+
+def build(static_folder):
+    """Write minified, hashed and compressed copies of ASSETS and return the manifest."""
+    dist = os.path.join(static_folder, DIST_FOLDER)
+    shutil.rmtree(dist, ignore_errors=True)
+
+    manifest = {}
+    for asset in ASSETS:
+        with open(os.path.join(static_folder, asset), 'rb') as f:
+            source = f.read()
+        text = source.decode('utf-8')
+        minified = (minify_css(text) if asset.endswith('.css') else minify_js(text)).encode('utf-8')
+
+        base, ext = os.path.splitext(asset)
+        built = f'{DIST_FOLDER}/{base}.{digest(minified)}{ext}'
+        path = os.path.join(static_folder, built)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(minified)
+        with open(path + '.gz', 'wb') as f:
+            f.write(gzip.compress(minified, compresslevel=9, mtime=0))
+        with open(path + '.br', 'wb') as f:
+            f.write(brotli.compress(minified, quality=11))
+
+        manifest[asset] = {'file': built, 'source': digest(source)}
+
+    with open(os.path.join(dist, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_manifest(static_folder):
+    """Return a mapping of source asset to built file, skipping stale entries.
+
+    An entry is stale when its source file changed after the last build, so
+    editing a stylesheet or script serves the edited file until the next
+    build instead of an outdated one.
+    """
+    try:
+        with open(os.path.join(static_folder, DIST_FOLDER, MANIFEST_NAME)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    current = {}
+    for asset, entry in manifest.items():
+        try:
+            with open(os.path.join(static_folder, asset), 'rb') as f:
+                if digest(f.read()) == entry['source']:
+                    current[asset] = entry['file']
+        except OSError:
+            continue
+    return current
+
+
+def preferred_encoding(available):
+    """Return the best content coding the client accepts out of available, or None."""
+    for encoding in available:
+        if request.accept_encodings[encoding] > 0:
+            return encoding
+    return None
+
+
+def send_built(static_folder, filename):
+    """Send a built file, pre-compressed if the client accepts it, with immutable caching."""
+    mimetype = MIMETYPES.get(os.path.splitext(filename)[1])
+    encodings = [
+        (encoding, suffix) for encoding, suffix in (('br', '.br'), ('gzip', '.gz'))
+        if os.path.isfile(os.path.join(static_folder, filename + suffix))
+    ]
+    encoding = preferred_encoding([encoding for encoding, _ in encodings])
+    suffix = dict(encodings).get(encoding, '')
+
+    response = send_from_directory(static_folder, filename + suffix, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def compress_response(app, response):
+    """Compress a large response on a configured path if the client accepts it."""
+    if not request.path.startswith(tuple(app.config["COMPRESS_PATH_PREFIXES"])):
+        return response
+    if response.status_code != 200 or response.direct_passthrough or 'Content-Encoding' in response.headers:
+        return response
+
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if len(data) < app.config["COMPRESS_MIN_SIZE"]:
+        return response
+
+    encoding = preferred_encoding(['br', 'gzip'])
+    if encoding == 'br':
+        response.set_data(brotli.compress(data, quality=5))
+    elif encoding == 'gzip':
+        response.set_data(gzip.compress(data, compresslevel=6))
+    else:
+        return response
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def init_app(app):
+    """Serve built assets when a current build exists, and register response compression."""
+    app.config.setdefault("ASSETS_USE_BUILD", True)
+    app.config.setdefault("COMPRESS_MIN_SIZE", 1024)
+    app.config.setdefault("COMPRESS_PATH_PREFIXES", ('/api/', '/export'))
+
+    manifest = load_manifest(app.static_folder) if app.config["ASSETS_USE_BUILD"] else {}
+
+    @app.url_defaults
+    def fingerprint_static_urls(endpoint, values):
+        """Point url_for('static', ...) at the hashed build of an asset."""
+        if endpoint == 'static' and values.get('filename') in manifest:
+            values['filename'] = manifest[values['filename']]
+
+    serve_static = app.view_functions['static']
+
+    def static(filename):
+        """Serve static files, sending built assets through send_built()."""
+        if filename.startswith(DIST_FOLDER + '/'):
+            return send_built(app.static_folder, filename)
+        return serve_static(filename=filename)
+
+    app.view_functions['static'] = static
+    app.after_request(lambda response: compress_response(app, response))
+
+
+if __name__ == '__main__':
+    # python -m assets: build without creating the app, so no database is needed
+    for asset, entry in build(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')).items():
+        print(f"{asset} -> {entry['file']}")
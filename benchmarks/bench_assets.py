@@ -0,0 +1,163 @@
+"""Measure the bytes one dashboard load transfers from the app.
+
+Copies the app into a throwaway directory, seeds a user with N expenses
+(200 by default) and a few recurring rules, and loads /dashboard the way a
+browser does: the page itself, the app's own stylesheet and scripts, and
+the five /api/* calls charts.js makes. Third-party CDN files are left out;
+they are not served by the app.
+
+- before: the unbuilt static files, no response compression and
+  ASCII-escaped JSON, as the app shipped before assets.py;
+- after: `python -m assets` output and compressed API responses, for a
+  client that accepts gzip only and one that also accepts br.
+
+A first visit fetches everything. On a repeat visit the unbuilt files are
+revalidated with a conditional request each (a 304 with an empty body),
+while fingerprinted files are immutable and not requested at all. Byte
+counts are response bodies as sent; headers are not included.
+
+Usage: python benchmarks/bench_assets.py [expenses]
+"""
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+API_CALLS = [
+    '/api/category-breakdown?period=month',
+    '/api/monthly-trend?months=6',
+    '/api/financial-insights',
+    '/api/upcoming-recurring?days=30&limit=5',
+    '/api/expense-stats?period=month',
+]
+
+
+def copy_app(target):
+    """Copy the app's modules, templates and static files into target."""
+    for name in os.listdir(ROOT):
+        if name.endswith('.py'):
+            shutil.copy(os.path.join(ROOT, name), target)
+    shutil.copytree(os.path.join(ROOT, 'templates'), os.path.join(target, 'templates'))
+    shutil.copytree(os.path.join(ROOT, 'static'), os.path.join(target, 'static'),
+                    ignore=shutil.ignore_patterns('dist'))
+
+
+def seed(app, expenses):
+    """Create the benchmark user with random expenses and recurring rules."""
+    from extensions import db
+    from models import User, Expense, RecurringExpense
+    from routes import categories
+
+    rng = random.Random(42)
+    with app.app_context():
+        user = User(username='owner', email='owner@example.com')
+        user.set_password('owner-password')
+        db.session.add(user)
+        db.session.flush()
+        today = datetime.now()
+        for i in range(expenses):
+            db.session.add(Expense(
+                amount=round(rng.uniform(50, 5000), 2),
+                date=today - timedelta(days=rng.randrange(180)),
+                description=f'Expense {i}',
+                category=rng.choice(categories),
+                user_id=user.id
+            ))
+        for i, category in enumerate(categories[:5]):
+            start = date.today() + timedelta(days=i)
+            db.session.add(RecurringExpense(
+                amount=499.0, description=f'Subscription {i}', category=category,
+                frequency='monthly', every=1, start_date=start, next_due=start, user_id=user.id
+            ))
+        db.session.commit()
+
+
+def dashboard_load(client, accept_encoding, repeat):
+    """Load the dashboard like a browser; return (requests, bytes) per resource kind."""
+    headers = {'Accept-Encoding': accept_encoding} if accept_encoding else {}
+    totals = {}
+
+    def fetch(kind, path, extra=None):
+        response = client.get(path, headers={**headers, **(extra or {})})
+        size = len(response.get_data())
+        response.close()
+        requests, total = totals.get(kind, (0, 0))
+        totals[kind] = (requests + 1, total + size)
+
+    page = client.get('/dashboard', headers=headers)
+    html = page.get_data()
+    totals['html'] = (1, len(html))
+    page.close()
+
+    for path in re.findall(r'(?:href|src)="(/static/[^"]+)"', html.decode()):
+        if not repeat:
+            fetch('static', path)
+            continue
+        # a repeat visit: immutable files come from the browser cache untouched
+        response = client.get(path, headers=headers)
+        immutable = 'immutable' in response.headers.get('Cache-Control', '')
+        etag = response.headers.get('ETag')
+        response.close()
+        if not immutable:
+            fetch('static', path, {'If-None-Match': etag})
+
+    for path in API_CALLS:
+        fetch('api', path)
+    return totals
+
+
+def measure(app_dir, expenses):
+    """Return the dashboard transfer totals for each scenario."""
+    sys.path.insert(0, app_dir)
+    os.environ['RECURRING_INTERVAL'] = '0'
+    os.environ['PASSWORD_HASH_WORKERS'] = '0'
+    import assets
+    from app import create_app
+
+    base_config = {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{os.path.join(app_dir, "bench.db")}',
+                   'WTF_CSRF_ENABLED': False}
+
+    before = create_app({**base_config, 'ASSETS_USE_BUILD': False, 'COMPRESS_MIN_SIZE': float('inf')})
+    before.json.ensure_ascii = True
+    seed(before, expenses)
+
+    assets.build(before.static_folder)
+    after = create_app(base_config)
+
+    results = {}
+    for name, app, accept_encoding in (('before', before, 'gzip, deflate, br'),
+                                       ('after (gzip)', after, 'gzip'),
+                                       ('after (br)', after, 'gzip, deflate, br')):
+        client = app.test_client()
+        client.post('/login', data={'email': 'owner@example.com', 'password': 'owner-password'})
+        results[name] = (dashboard_load(client, accept_encoding, repeat=False),
+                         dashboard_load(client, accept_encoding, repeat=True))
+    return results
+
+
+def main():
+    expenses = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    app_dir = tempfile.mkdtemp(prefix='bench-assets-')
+    try:
+        copy_app(app_dir)
+        results = measure(app_dir, expenses)
+    finally:
+        shutil.rmtree(app_dir, ignore_errors=True)
+
+    print(f"Dashboard load, {expenses} expenses (requests / body bytes)")
+    print(f"{'scenario':<14}{'visit':<8}{'html':>14}{'static':>16}{'api':>16}{'total':>16}")
+    for name, visits in results.items():
+        for visit, totals in zip(('first', 'repeat'), visits):
+            cells = [totals.get(kind, (0, 0)) for kind in ('html', 'static', 'api')]
+            total = (sum(c[0] for c in cells), sum(c[1] for c in cells))
+            row = ''.join(f'{f"{r} / {b}":>16}' for r, b in cells[1:] + [total])
+            print(f"{name:<14}{visit:<8}{f'{cells[0][0]} / {cells[0][1]}':>14}{row}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""Benchmark login and dashboard latency during a login flood.
+
+Starts the app under gunicorn (2 gthread workers, 4 threads each) on a
+throwaway SQLite database and, for each configuration below, runs a flood
+of wrong-password logins against real accounts from many spoofed client
+IPs while one logged-in client keeps loading /dashboard.
+
+- unprotected: hashing inline in the request thread, no rate limits;
+- protected: the default hashing pool and login rate limits.
+
+Usage: python benchmarks/bench_login.py [seconds] [flood threads]
+"""
+import http.cookiejar
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app import create_app
+from extensions import db
+from models import User
+
+PORT = 5077
+ACCOUNTS = 20
+
+CONFIGS = {
+    'unprotected': {
+        'PASSWORD_HASH_WORKERS': 0,
+        'LOGIN_IP_BURST': 10 ** 9,
+        'LOGIN_ACCOUNT_BURST': 10 ** 9,
+    },
+    'protected': {},
+}
+
+
+def url(path):
+    """Return the benchmark server URL for path."""
+    return f'http://127.0.0.1:{PORT}{path}'
+
+
+def post(opener, path, data, headers=None):
+    """POST a form and return the status code, treating HTTP errors as responses."""
+    request = urllib.request.Request(url(path), data=urllib.parse.urlencode(data).encode(), headers=headers or {})
+    try:
+        with opener.open(request) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as error:
+        return error.code
+
+
+def percentile(timings, fraction):
+    """Return the given percentile of a list of timings in milliseconds."""
+    timings = sorted(timings)
+    return timings[min(len(timings) - 1, int(len(timings) * fraction))] if timings else float('nan')
+
+
+def run(name, overrides, database_uri, seconds, threads):
+    """Run one flood against a gunicorn server started with the given config overrides."""
+    config = {'SQLALCHEMY_DATABASE_URI': database_uri, 'WTF_CSRF_ENABLED': False,
+              'RECURRING_INTERVAL': 0, **overrides}
+    server = subprocess.Popen(
+        ['gunicorn', '--bind', f'127.0.0.1:{PORT}', '--workers', '2', '--threads', '4',
+         '--worker-class', 'gthread', f'app:create_app({config!r})'],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        for _ in range(100):
+            try:
+                urllib.request.urlopen(url('/login')).read()
+                break
+            except OSError:
+                time.sleep(0.1)
+
+        dashboard = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+        post(dashboard, '/login', {'email': 'owner@example.com', 'password': 'owner-password'},
+             {'X-Forwarded-For': '10.255.255.1'})
+
+        stop = time.monotonic() + seconds
+        login_timings, dashboard_timings, statuses = [], [], {}
+        lock = threading.Lock()
+
+        def flood():
+            opener = urllib.request.build_opener()
+            while time.monotonic() < stop:
+                headers = {'X-Forwarded-For': f'10.{random.randrange(255)}.{random.randrange(255)}.{random.randrange(255)}'}
+                started = time.perf_counter()
+                status = post(opener, '/login', {'email': f'user{random.randrange(ACCOUNTS)}@example.com',
+                                                 'password': 'wrong-password'}, headers)
+                with lock:
+                    login_timings.append((time.perf_counter() - started) * 1000)
+                    statuses[status] = statuses.get(status, 0) + 1
+
+        workers = [threading.Thread(target=flood) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        while time.monotonic() < stop:
+            started = time.perf_counter()
+            dashboard.open(url('/dashboard')).read()
+            dashboard_timings.append((time.perf_counter() - started) * 1000)
+            time.sleep(0.05)
+        for worker in workers:
+            worker.join()
+
+        print(f'{name:12} logins {len(login_timings):5d} {dict(sorted(statuses.items()))}')
+        print(f'{"":12} login p50 {percentile(login_timings, 0.5):8.1f} ms   p99 {percentile(login_timings, 0.99):8.1f} ms')
+        print(f'{"":12} dashboard p50 {percentile(dashboard_timings, 0.5):8.1f} ms   '
+              f'p99 {percentile(dashboard_timings, 0.99):8.1f} ms')
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    with tempfile.TemporaryDirectory() as tmp:
+        database_uri = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        with create_app({'SQLALCHEMY_DATABASE_URI': database_uri, 'RECURRING_INTERVAL': 0,
+                         'PASSWORD_HASH_WORKERS': 0}).app_context():
+            owner = User(username='owner', email='owner@example.com')
+            owner.set_password('owner-password')
+            db.session.add(owner)
+            for i in range(ACCOUNTS):
+                user = User(username=f'user{i}', email=f'user{i}@example.com')
+                user.set_password(f'password-{i}')
+                db.session.add(user)
+            db.session.commit()
+
+        for name, overrides in CONFIGS.items():
+            run(name, overrides, database_uri, seconds, threads)
+
+
+if __name__ == '__main__':
+    main()
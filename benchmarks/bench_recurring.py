@@ -0,0 +1,107 @@
+"""Benchmark recurring expense materialization.
+
+Builds a throwaway SQLite database with a few recurring rules per user that
+started 90 days ago, then times:
+
+- the first scheduler run, which catches up on every due occurrence;
+- a second run, which must find nothing left to do;
+- two worker processes racing on a fresh copy of the rules, which must
+  still create each occurrence exactly once;
+- lazily projecting the next 90 days of occurrences without inserting them.
+
+Usage: python benchmarks/bench_recurring.py [users]
+"""
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from extensions import db
+from models import User, Expense, RecurringExpense
+from recurring import materialize_due, project_occurrences
+
+RULES = [
+    ('Rent', 'Housing', 'monthly', 1, 15000.0),
+    ('Electricity', 'Utilities', 'monthly', 1, 1800.0),
+    ('Netflix', 'Entertainment', 'monthly', 1, 649.0),
+    ('Gym', 'Healthcare', 'weekly', 1, 300.0),
+    ('Newspaper', 'Miscellaneous', 'custom', 3, 20.0),
+]
+
+
+def make_app(path):
+    """Create an app bound to the SQLite file at path, with the scheduler disabled."""
+    return create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}', 'RECURRING_INTERVAL': 0})
+
+
+def populate(users):
+    """Insert the benchmark users and their recurring rules."""
+    start = date.today() - timedelta(days=90)
+    db.session.execute(db.insert(User), [
+        {'id': i, 'username': f'user{i}', 'email': f'user{i}@example.com', 'password_hash': 'x'}
+        for i in range(1, users + 1)
+    ])
+    db.session.execute(db.insert(RecurringExpense), [
+        {'amount': amount, 'description': description, 'category': category,
+         'frequency': frequency, 'every': every, 'start_date': start,
+         'next_due': start, 'user_id': user_id}
+        for user_id in range(1, users + 1)
+        for description, category, frequency, every, amount in RULES
+    ])
+    db.session.commit()
+
+
+def race(path, results):
+    """Run one scheduler pass in a separate worker process."""
+    with make_app(path).app_context():
+        results.put(materialize_due())
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        app = make_app(path)
+        with app.app_context():
+            populate(users)
+            db.engine.dispose()
+        shutil.copy(path, os.path.join(tmp, 'race.db'))
+
+        with app.app_context():
+            print(f'{users} users, {users * len(RULES)} rules')
+
+            started = time.perf_counter()
+            created = materialize_due()
+            print(f'first run     {created:8d} expenses in {time.perf_counter() - started:6.2f}s')
+
+            started = time.perf_counter()
+            created = materialize_due()
+            print(f'second run    {created:8d} expenses in {time.perf_counter() - started:6.2f}s')
+
+            rules = RecurringExpense.query.all()
+            started = time.perf_counter()
+            projected = sum(1 for _ in project_occurrences(rules, date.today() + timedelta(days=90)))
+            print(f'projection    {projected:8d} occurrences in {time.perf_counter() - started:6.2f}s')
+            expected = Expense.query.count()
+
+        race_path = os.path.join(tmp, 'race.db')
+        results = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=race, args=(race_path, results)) for _ in range(2)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        with make_app(race_path).app_context():
+            total = Expense.query.count()
+        created = [results.get() for _ in workers]
+        print(f'two workers   {created} expenses, {total} in table, expected {expected}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Benchmark description search over a large expense table.
+
+Builds a throwaway SQLite database with N expenses (one million by default)
+spread across a handful of users with long histories, then times the FTS5
+prefix search used by the /expenses page against the LIKE '%...%' scan it
+replaces. Each search is combined with a category filter, date sort and a
+50-row keyset page, for a common term ("ub", about one row in eight) and a
+rare one ("shop421", about one row in five hundred).
+
+Usage: python benchmarks/bench_search.py [rows]
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from extensions import db
+from models import User, Expense
+from routes import categories, EXPENSES_PER_PAGE
+from search import apply_search
+
+WORDS = [
+    'uber', 'ola', 'swiggy', 'zomato', 'rent', 'electricity', 'water', 'netflix',
+    'groceries', 'pharmacy', 'petrol', 'metro', 'movie', 'books', 'gym', 'coffee',
+    'lunch', 'dinner', 'flight', 'hotel', 'internet', 'mobile', 'insurance', 'taxi',
+]
+MERCHANTS = 5000
+USERS = 20
+REPEATS = 20
+
+
+def populate(rows):
+    """Insert the benchmark users and expenses in batches."""
+    rng = random.Random(42)
+    db.session.execute(db.insert(User), [
+        {'id': i, 'username': f'user{i}', 'email': f'user{i}@example.com', 'password_hash': 'x'}
+        for i in range(1, USERS + 1)
+    ])
+    start = datetime(2015, 1, 1)
+    batch = []
+    for _ in range(rows):
+        batch.append({
+            'id': str(uuid.uuid4()),
+            'amount': round(rng.uniform(10, 5000), 2),
+            'date': start + timedelta(days=rng.randrange(3650)),
+            'description': ' '.join(rng.sample(WORDS, 2) + [f'shop{rng.randrange(MERCHANTS)}']),
+            'category': rng.choice(categories),
+            'user_id': rng.randrange(1, USERS + 1),
+        })
+        if len(batch) == 10000:
+            db.session.execute(db.insert(Expense), batch)
+            batch = []
+    if batch:
+        db.session.execute(db.insert(Expense), batch)
+    db.session.commit()
+
+
+def page_query(user_id):
+    """Build the first-page /expenses query for a user, minus the search."""
+    return (Expense.query
+            .filter_by(user_id=user_id, category='Transportation')
+            .order_by(Expense.date.desc(), Expense.id.desc()))
+
+
+def measure(run):
+    """Return the median and p95 latency of run() in milliseconds."""
+    timings = []
+    for i in range(REPEATS):
+        started = time.perf_counter()
+        run(i)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'bench.db')}"})
+        with app.app_context():
+            started = time.perf_counter()
+            populate(rows)
+            print(f'Inserted {rows} expenses (index kept in sync by triggers) '
+                  f'in {time.perf_counter() - started:.1f}s')
+
+            for term in ('ub', 'shop421'):
+                def like(i):
+                    (page_query(i % USERS + 1)
+                     .filter(Expense.description.ilike(f'%{term}%'))
+                     .limit(EXPENSES_PER_PAGE).all())
+
+                def fts(i):
+                    user_id = i % USERS + 1
+                    apply_search(page_query(user_id), term, user_id).limit(EXPENSES_PER_PAGE).all()
+
+                for name, run in (('LIKE scan', like), ('FTS5 prefix', fts)):
+                    median, p95 = measure(run)
+                    print(f'{term:8} {name:12} median {median:8.2f} ms   p95 {p95:8.2f} ms')
+
+if __name__ == '__main__':
+    main()
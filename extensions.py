@@ -1,14 +1,20 @@
 """Extensions module.
 
-This module contains the SQLAlchemy and Flask-Login extension instances.
+This module contains the SQLAlchemy, Flask-Login and login rate limiter
+extension instances.
 """
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 
+from ratelimit import LoginRateLimiter
+
 # Initialize SQLAlchemy with no session options
 db = SQLAlchemy()
 
 # Initialize LoginManager
 login_manager = LoginManager()
 login_manager.login_view = 'main.login'
-login_manager.login_message_category = 'info'
\ No newline at end of file
+login_manager.login_message_category = 'info'
+
+# Initialize login rate limiter
+login_limiter = LoginRateLimiter()
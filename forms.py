@@ -1,8 +1,11 @@
+from datetime import date, timedelta
+
 from flask_wtf import FlaskForm
-from wtforms import StringField, PasswordField, SubmitField, FloatField, SelectField, DateField
-from wtforms.validators import DataRequired, Email, Length, EqualTo, ValidationError
+from wtforms import StringField, PasswordField, SubmitField, FloatField, SelectField, DateField, IntegerField
+from wtforms.validators import DataRequired, Email, Length, EqualTo, ValidationError, NumberRange, Optional
 
 from models import User
+from recurring import FREQUENCIES, MAX_BACKFILL_DAYS
 
 class LoginForm(FlaskForm):
     """Form for user login."""
@@ -37,4 +40,25 @@ class ExpenseForm(FlaskForm):
     date = DateField('Date', validators=[DataRequired()], format='%Y-%m-%d')
     description = StringField('Description', validators=[DataRequired(), Length(max=255)])
     category = SelectField('Category', validators=[DataRequired()])
-    submit = SubmitField('Save')
\ No newline at end of file
+    submit = SubmitField('Save')
+
+class RecurringExpenseForm(FlaskForm):
+    """Form for adding recurring expense rules."""
+    amount = FloatField('Amount (₹)', validators=[DataRequired(), NumberRange(min=0.01)])
+    description = StringField('Description', validators=[DataRequired(), Length(max=255)])
+    category = SelectField('Category', validators=[DataRequired()])
+    frequency = SelectField('Repeats', choices=FREQUENCIES, validators=[DataRequired()])
+    every = IntegerField('Every', default=1, validators=[DataRequired(), NumberRange(min=1, max=365)])
+    start_date = DateField('Start Date', validators=[DataRequired()], format='%Y-%m-%d')
+    end_date = DateField('End Date', validators=[Optional()], format='%Y-%m-%d')
+    submit = SubmitField('Save')
+
+    def validate_start_date(self, start_date):
+        """Check that the start date is not too far in the past."""
+        if start_date.data and start_date.data < date.today() - timedelta(days=MAX_BACKFILL_DAYS):
+            raise ValidationError(f'Start date can be at most {MAX_BACKFILL_DAYS} days in the past.')
+
+    def validate_end_date(self, end_date):
+        """Check that the end date is not before the start date."""
+        if end_date.data and self.start_date.data and end_date.data < self.start_date.data:
+            raise ValidationError('End date must be on or after the start date.')
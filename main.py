@@ -1,6 +1,9 @@
 from app import create_app
 
-app = create_app()
+# password hashing processes import this script again as __mp_main__; only
+# the process that runs it, or gunicorn's import of main:app, builds the app
+if __name__ != "__mp_main__":
+    app = create_app()
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000, debug=True)
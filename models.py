@@ -1,9 +1,8 @@
 import uuid
 from datetime import datetime
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
-
 from extensions import db
+from passwords import HashingBusy, hash_password, verify_password, needs_rehash
 
 class User(UserMixin, db.Model):
     """User model for authentication."""
@@ -16,17 +15,34 @@ class User(UserMixin, db.Model):
     
     def set_password(self, password):
         """Set user password using hashing."""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
-        """Check if the provided password matches the hash."""
-        return check_password_hash(self.password_hash, password)
+        """Check if the provided password matches the hash.
+        
+        A matching password whose hash uses outdated parameters is rehashed
+        with the configured method; the caller commits the session. If the
+        hashing pool is too busy to rehash, the old hash is kept and the
+        upgrade is retried on the next login.
+        """
+        if not verify_password(self.password_hash, password):
+            return False
+        try:
+            if needs_rehash(self.password_hash):
+                self.password_hash = hash_password(password)
+        except HashingBusy:
+            pass
+        return True
     
     def __repr__(self):
         return f'<User {self.username}>'
 
 class Expense(db.Model):
     """Expense model stored in database."""
+    __table_args__ = (
+        db.Index('ix_expense_user_date', 'user_id', 'date'),
+    )
+    
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     amount = db.Column(db.Float, nullable=False)
     date = db.Column(db.DateTime, nullable=False)
@@ -44,4 +60,49 @@ class Expense(db.Model):
             'description': self.description,
             'category': self.category,
             'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S')
-        }
\ No newline at end of file
+        }
+
+class RecurringExpense(db.Model):
+    """Recurring expense rule that is materialized into expenses on a schedule."""
+    __table_args__ = (
+        db.Index('ix_recurring_expense_next_due', 'next_due'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    amount = db.Column(db.Float, nullable=False)
+    description = db.Column(db.String(255), nullable=False)
+    category = db.Column(db.String(100), nullable=False)
+    frequency = db.Column(db.String(20), nullable=False)
+    every = db.Column(db.Integer, nullable=False, default=1)
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date)
+    next_due = db.Column(db.Date)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        """Convert recurring expense rule to dictionary."""
+        return {
+            'id': self.id,
+            'amount': self.amount,
+            'description': self.description,
+            'category': self.category,
+            'frequency': self.frequency,
+            'every': self.every,
+            'start_date': self.start_date.strftime('%Y-%m-%d'),
+            'end_date': self.end_date.strftime('%Y-%m-%d') if self.end_date else None,
+            'next_due': self.next_due.strftime('%Y-%m-%d') if self.next_due else None
+        }
+
+class RecurringOccurrence(db.Model):
+    """Occurrence of a recurring expense rule that has already been materialized.
+    
+    The primary key makes each (rule, date) pair insertable only once, so
+    concurrent schedulers cannot create the same expense twice.
+    """
+    rule_id = db.Column(db.Integer, db.ForeignKey('recurring_expense.id'), primary_key=True)
+    occurrence_date = db.Column(db.Date, primary_key=True)
+
+class SchemaVersion(db.Model):
+    """Single-row table recording the schema version the database was migrated to."""
+    version = db.Column(db.Integer, primary_key=True)
@@ -0,0 +1,110 @@
+"""Password hashing module.
+
+This module hashes and checks passwords with the method configured in
+PASSWORD_HASH_METHOD, and runs the hashing in a small process pool so a
+burst of logins cannot occupy every request worker's CPU. The pool is
+bounded: once PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE hashes are in
+flight, further requests fail fast with HashingBusy instead of queueing.
+Pool processes run at a lower CPU priority, so on a shared CPU ordinary
+requests are served ahead of queued hashes.
+"""
+import os
+import threading
+from concurrent.futures import BrokenExecutor
+
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+_executor = None
+_slots = None
+_lock = threading.Lock()
+_canonical_methods = {}
+
+
+class HashingBusy(Exception):
+    """Raised when too many password hashes are already in flight."""
+
+
+def _get_executor():
+    """Return the hashing pool and its slot semaphore, creating them on first use."""
+    global _executor, _slots
+    # imported here so workers that never hash a password skip loading multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import get_context
+
+    with _lock:
+        if _executor is None:
+            workers = current_app.config["PASSWORD_HASH_WORKERS"]
+            # spawn rather than fork: the parent may already be running threads. Spawned
+            # processes re-import the launching script, which main.py guards against
+            _executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=get_context('spawn'),
+                initializer=os.nice,
+                initargs=(current_app.config["PASSWORD_HASH_NICE"],)
+            )
+            _slots = threading.BoundedSemaphore(workers + current_app.config["PASSWORD_HASH_QUEUE"])
+    return _executor, _slots
+
+
+def _discard_executor(executor):
+    """Forget a broken pool so the next hash starts a fresh one."""
+    global _executor, _slots
+    with _lock:
+        if _executor is executor:
+            _executor = None
+            _slots = None
+    executor.shutdown(wait=False)
+
+
+def _run(func, *args):
+    """Run a hashing function in the pool, or inline when the pool is disabled."""
+    if current_app.config["PASSWORD_HASH_WORKERS"] <= 0:
+        return func(*args)
+
+    executor, slots = _get_executor()
+    if not slots.acquire(blocking=False):
+        raise HashingBusy()
+    try:
+        future = executor.submit(func, *args)
+    except BrokenExecutor:
+        slots.release()
+        _discard_executor(executor)
+        raise HashingBusy()
+    future.add_done_callback(lambda _: slots.release())
+    try:
+        return future.result(timeout=current_app.config["PASSWORD_HASH_TIMEOUT"])
+    except TimeoutError:
+        raise HashingBusy()
+    except BrokenExecutor:
+        # a pool process died, e.g. killed by the OOM killer
+        _discard_executor(executor)
+        raise HashingBusy()
+
+
+def hash_password(password):
+    """Hash a password with the configured method."""
+    return _run(generate_password_hash, password, current_app.config["PASSWORD_HASH_METHOD"])
+
+
+def verify_password(password_hash, password):
+    """Check a password against a stored hash."""
+    return _run(check_password_hash, password_hash, password)
+
+
+def canonical_method(method):
+    """Return the full method string werkzeug writes into hashes made with method.
+
+    werkzeug fills in defaults for a partial method, so "pbkdf2:sha256"
+    produces hashes starting "pbkdf2:sha256:1000000". The result is found by
+    hashing an empty password once per method, and cached.
+    """
+    if method not in _canonical_methods:
+        _canonical_methods[method] = _run(generate_password_hash, '', method).split('$', 1)[0]
+    return _canonical_methods[method]
+
+
+def needs_rehash(password_hash):
+    """Return True if a stored hash was made with different parameters than the configured method."""
+    stored = password_hash.split('$', 1)[0]
+    return stored != canonical_method(current_app.config["PASSWORD_HASH_METHOD"])
@@ -0,0 +1,69 @@
+"""Rate limiting module.
+
+This module provides in-memory token buckets used to throttle login
+attempts per client IP and per account. Buckets live in each worker
+process, so with several gunicorn workers the effective limit is the
+configured one times the number of workers.
+"""
+import threading
+import time
+
+
+class TokenBucket:
+    """Set of token buckets keyed by an arbitrary string."""
+
+    def __init__(self, capacity, per_minute, max_keys=10000):
+        """Initialize buckets holding capacity tokens, refilled at per_minute tokens a minute."""
+        self.capacity = capacity
+        self.rate = per_minute / 60.0
+        self.max_keys = max_keys
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def allow(self, key):
+        """Take a token from the bucket for key; return False if it is empty."""
+        now = time.monotonic()
+        with self.lock:
+            tokens, updated = self.buckets.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+            if tokens < 1:
+                self.buckets[key] = (tokens, now)
+                return False
+            self.buckets[key] = (tokens - 1, now)
+            if len(self.buckets) > self.max_keys:
+                self._prune(now)
+            return True
+
+    def _prune(self, now):
+        """Drop buckets that have refilled completely, then the oldest if still too many."""
+        for key, (tokens, updated) in list(self.buckets.items()):
+            if tokens + (now - updated) * self.rate >= self.capacity:
+                del self.buckets[key]
+        if len(self.buckets) > self.max_keys:
+            oldest = sorted(self.buckets, key=lambda key: self.buckets[key][1])
+            for key in oldest[:len(oldest) - self.max_keys // 2]:
+                del self.buckets[key]
+
+
+class LoginRateLimiter:
+    """Flask extension limiting login attempts per client IP and per account."""
+
+    def __init__(self, app=None):
+        """Initialize the limiter, optionally binding it to an app."""
+        self.by_ip = None
+        self.by_account = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Create the buckets from the app's LOGIN_* configuration."""
+        app.config.setdefault("LOGIN_IP_BURST", 20)
+        app.config.setdefault("LOGIN_IP_PER_MINUTE", 10)
+        app.config.setdefault("LOGIN_ACCOUNT_BURST", 5)
+        app.config.setdefault("LOGIN_ACCOUNT_PER_MINUTE", 2)
+        self.by_ip = TokenBucket(app.config["LOGIN_IP_BURST"], app.config["LOGIN_IP_PER_MINUTE"])
+        self.by_account = TokenBucket(app.config["LOGIN_ACCOUNT_BURST"], app.config["LOGIN_ACCOUNT_PER_MINUTE"])
+
+    def allow(self, ip, account):
+        """Return True if a login attempt from ip for account may proceed."""
+        return self.by_ip.allow(ip) and self.by_account.allow(account.lower())
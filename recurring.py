@@ -0,0 +1,273 @@
+"""Recurring expenses module.
+
+This module turns recurring expense rules into ordinary expenses. A
+background scheduler in each worker periodically materializes every
+occurrence that has come due, in batches. Each materialized occurrence is
+recorded in the recurring_occurrence table, whose primary key guarantees
+that an occurrence is inserted at most once, no matter how many workers
+or restarts race on it. Future occurrences can also be projected lazily
+without being inserted.
+
+The examples below pin down the date arithmetic: month-end clamping,
+intervals longer than one period and end dates. Run them with
+`python -m doctest recurring.py` after changing it.
+
+>>> from types import SimpleNamespace
+>>> monthly = SimpleNamespace(frequency='monthly', every=1, start_date=date(2024, 1, 31), end_date=None)
+>>> [occurrence_date(monthly, index) for index in range(4)]
+[datetime.date(2024, 1, 31), datetime.date(2024, 2, 29), datetime.date(2024, 3, 31), datetime.date(2024, 4, 30)]
+>>> first_index_on_or_after(monthly, date(2024, 3, 1))
+2
+>>> next_due_after(monthly, date(2024, 2, 29))
+datetime.date(2024, 3, 31)
+>>> quarterly = SimpleNamespace(frequency='monthly', every=3, start_date=date(2023, 11, 30), end_date=None)
+>>> next_due_after(quarterly, date(2023, 11, 30))
+datetime.date(2024, 2, 29)
+
+>>> fortnightly = SimpleNamespace(frequency='weekly', every=2, start_date=date(2024, 1, 1), end_date=None)
+>>> [occurrence_date(fortnightly, index) for index in range(3)]
+[datetime.date(2024, 1, 1), datetime.date(2024, 1, 15), datetime.date(2024, 1, 29)]
+>>> first_index_on_or_after(fortnightly, date(2024, 1, 2))
+1
+>>> next_due_after(fortnightly, date(2024, 1, 15))
+datetime.date(2024, 1, 29)
+
+>>> every_3_days = SimpleNamespace(frequency='custom', every=3, start_date=date(2024, 1, 1),
+...                                end_date=date(2024, 1, 9), next_due=date(2024, 1, 4))
+>>> list(iter_occurrences(every_3_days, until=date(2024, 12, 31)))
+[datetime.date(2024, 1, 4), datetime.date(2024, 1, 7)]
+>>> next_due_after(every_3_days, date(2024, 1, 4))
+datetime.date(2024, 1, 7)
+>>> next_due_after(every_3_days, date(2024, 1, 7)) is None
+True
+"""
+import calendar
+import heapq
+import random
+import threading
+import time
+from datetime import date, datetime, timedelta
+from itertools import islice
+
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from extensions import db
+
+# Supported rule frequencies; "custom" repeats every N days
+FREQUENCIES = [
+    ('daily', 'Daily'),
+    ('weekly', 'Weekly'),
+    ('monthly', 'Monthly'),
+    ('custom', 'Every N days')
+]
+
+# Number of due rules materialized per transaction
+BATCH_SIZE = 500
+
+# Furthest back a new rule may start; its past occurrences are inserted
+# while the form is submitted, so this bounds that request's work
+MAX_BACKFILL_DAYS = 366
+
+_scheduler_started = False
+_scheduler_lock = threading.Lock()
+
+
+def add_months(start, months):
+    """Return start moved forward by the given months, clamping the day to the month length."""
+    month_index = start.month - 1 + months
+    year = start.year + month_index // 12
+    month = month_index % 12 + 1
+    day = min(start.day, calendar.monthrange(year, month)[1])
+    return date(year, month, day)
+
+
+def occurrence_date(rule, index):
+    """Return the date of the index-th occurrence of a rule, counting from zero."""
+    if rule.frequency == 'monthly':
+        return add_months(rule.start_date, index * rule.every)
+    if rule.frequency == 'weekly':
+        return rule.start_date + timedelta(weeks=index * rule.every)
+    return rule.start_date + timedelta(days=index * rule.every)
+
+
+def first_index_on_or_after(rule, day):
+    """Return the index of the first occurrence of a rule on or after day."""
+    if day <= rule.start_date:
+        return 0
+    if rule.frequency == 'monthly':
+        months = (day.year - rule.start_date.year) * 12 + day.month - rule.start_date.month
+        index = max(0, months // rule.every - 1)
+    else:
+        step = rule.every * (7 if rule.frequency == 'weekly' else 1)
+        index = (day - rule.start_date).days // step
+    while occurrence_date(rule, index) < day:
+        index += 1
+    return index
+
+
+def iter_occurrences(rule, until, since=None):
+    """Lazily yield the dates of a rule's occurrences that are not yet materialized.
+
+    Dates run from the rule's next due date, or since if later, up to and
+    including until, and stop at the rule's end date.
+    """
+    if rule.next_due is None:
+        return
+    since = max(rule.next_due, since) if since else rule.next_due
+    if rule.end_date and rule.end_date < until:
+        until = rule.end_date
+    index = first_index_on_or_after(rule, since)
+    current = occurrence_date(rule, index)
+    while current <= until:
+        yield current
+        index += 1
+        current = occurrence_date(rule, index)
+
+
+def project_occurrences(rules, until, since=None, limit=None):
+    """Lazily project upcoming occurrences of several rules in date order.
+
+    Nothing is inserted; each occurrence is yielded as a dictionary shaped
+    like Expense.to_dict() with the rule id in place of an expense id.
+    """
+    def occurrences(rule):
+        for day in iter_occurrences(rule, until, since):
+            yield day, rule.id, rule
+
+    merged = heapq.merge(*(occurrences(rule) for rule in rules), key=lambda item: item[:2])
+    for day, rule_id, rule in islice(merged, limit):
+        yield {
+            'rule_id': rule_id,
+            'amount': rule.amount,
+            'date': day.strftime('%Y-%m-%d'),
+            'description': rule.description,
+            'category': rule.category
+        }
+
+
+def next_due_after(rule, day):
+    """Return the first occurrence of a rule after day, or None if the rule has ended."""
+    next_day = occurrence_date(rule, first_index_on_or_after(rule, day + timedelta(days=1)))
+    if rule.end_date and next_day > rule.end_date:
+        return None
+    return next_day
+
+
+def is_lock_contention(error):
+    """Return True if an OperationalError only means another writer held a lock."""
+    # 40P01 deadlock_detected and 55P03 lock_not_available on PostgreSQL
+    if getattr(error.orig, 'pgcode', None) in ('40P01', '55P03'):
+        return True
+    return 'database is locked' in str(error.orig)
+
+
+def materialize_due(today=None, user_id=None, batch_size=BATCH_SIZE):
+    """Insert an expense for every due occurrence of every recurring rule.
+
+    Rules are processed in batches of batch_size, one transaction per batch.
+    On PostgreSQL each batch locks its rules with SKIP LOCKED so concurrent
+    workers split the work; on SQLite writers are serialized and the
+    occurrence primary key rejects anything another worker already inserted.
+    A batch that loses such a race, or waits too long for another writer's
+    lock, is rolled back and left for the next run; any other database error
+    is raised.
+    Must be called inside an application context. Returns the number of
+    expenses created.
+    """
+    from models import Expense, RecurringExpense, RecurringOccurrence
+
+    today = today or date.today()
+    created = 0
+
+    while True:
+        query = RecurringExpense.query.filter(RecurringExpense.next_due <= today)
+        if user_id is not None:
+            query = query.filter(RecurringExpense.user_id == user_id)
+        rules = (query.order_by(RecurringExpense.id)
+                 .limit(batch_size)
+                 .with_for_update(skip_locked=True)
+                 .all())
+        if not rules:
+            break
+
+        occurrence_rows = []
+        expense_rows = []
+        for rule in rules:
+            for day in iter_occurrences(rule, today):
+                occurrence_rows.append({'rule_id': rule.id, 'occurrence_date': day})
+                expense_rows.append({
+                    'amount': rule.amount,
+                    'date': datetime.combine(day, datetime.min.time()),
+                    'description': rule.description,
+                    'category': rule.category,
+                    'user_id': rule.user_id
+                })
+            rule.next_due = next_due_after(rule, today)
+
+        try:
+            if occurrence_rows:
+                db.session.execute(RecurringOccurrence.__table__.insert(), occurrence_rows)
+                db.session.execute(Expense.__table__.insert(), expense_rows)
+            db.session.commit()
+        except IntegrityError:
+            # Another worker materialized some of these occurrences first
+            db.session.rollback()
+            break
+        except OperationalError as error:
+            db.session.rollback()
+            if not is_lock_contention(error):
+                raise
+            # Another worker holds the lock; the next run picks these rules up
+            break
+
+        created += len(expense_rows)
+        if len(rules) < batch_size:
+            break
+
+    return created
+
+
+def start_scheduler(app, interval):
+    """Start a daemon thread that materializes due occurrences every interval seconds.
+
+    Every worker process runs its own scheduler; materialize_due() makes the
+    overlapping runs safe. Each run starts after a random delay so workers
+    booted together do not all contend for the same rules.
+    """
+    global _scheduler_started
+    with _scheduler_lock:
+        if _scheduler_started:
+            return
+        _scheduler_started = True
+
+    def run():
+        while True:
+            time.sleep(random.uniform(0, min(interval, 30)))
+            try:
+                with app.app_context():
+                    created = materialize_due()
+                if created:
+                    app.logger.info("Materialized %d recurring expenses", created)
+            except Exception:
+                app.logger.exception("Failed to materialize recurring expenses")
+            time.sleep(interval)
+
+    threading.Thread(target=run, name='recurring-scheduler', daemon=True).start()
+
+
+def init_app(app):
+    """Register the recurring expense CLI command and, if enabled, the scheduler.
+
+    The scheduler starts with the first request a process serves, so CLI
+    commands and scripts that only create the app never run it.
+    """
+    @app.cli.command('materialize-recurring')
+    def materialize_recurring_command():
+        """Insert expenses for all due recurring expense occurrences."""
+        print(f"Materialized {materialize_due()} recurring expenses")
+
+    interval = app.config.get("RECURRING_INTERVAL", 0)
+    if interval > 0:
+        @app.before_request
+        def start_recurring_scheduler():
+            start_scheduler(app, interval)
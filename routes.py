@@ -1,11 +1,17 @@
 import uuid
+import json
+import base64
 from datetime import datetime, timedelta
-from flask import render_template, redirect, url_for, request, flash, jsonify, Blueprint
+from flask import render_template, redirect, url_for, request, flash, jsonify, Blueprint, current_app
 from flask_login import login_user, logout_user, login_required, current_user
+from sqlalchemy.exc import SQLAlchemyError
 
-from extensions import db
-from models import User, Expense
-from forms import LoginForm, RegistrationForm, ExpenseForm
+from extensions import db, login_limiter
+from models import User, Expense, RecurringExpense, RecurringOccurrence
+from forms import LoginForm, RegistrationForm, ExpenseForm, RecurringExpenseForm
+from search import apply_search
+from passwords import HashingBusy
+from recurring import FREQUENCIES, add_months, materialize_due, project_occurrences
 
 # Create a blueprint for all routes
 main_bp = Blueprint('main', __name__)
@@ -24,6 +30,40 @@ categories = [
     "Miscellaneous"
 ]
 
+# Number of expenses shown per page on the expenses list
+EXPENSES_PER_PAGE = 50
+
+# Columns the expenses list can be sorted by
+sort_columns = {
+    'date': Expense.date,
+    'amount': Expense.amount,
+    'category': Expense.category
+}
+
+def encode_cursor(expense, sort_by):
+    """Encode the sort key of the last expense on a page as a paging cursor."""
+    value = getattr(expense, sort_by)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([value, expense.id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_cursor(cursor, sort_by):
+    """Decode a paging cursor into a (sort value, expense id) pair, or None if invalid."""
+    try:
+        value, expense_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        if sort_by == 'date':
+            value = datetime.fromisoformat(value)
+        elif sort_by == 'amount':
+            value = float(value)
+        elif not isinstance(value, str):
+            return None
+        if not isinstance(expense_id, str):
+            return None
+        return value, expense_id
+    except (ValueError, TypeError):
+        return None
+
 @main_bp.route('/register', methods=['GET', 'POST'])
 def register():
     """Register a new user."""
@@ -34,7 +74,11 @@ def register():
     
     if form.validate_on_submit():
         user = User(username=form.username.data, email=form.email.data)
-        user.set_password(form.password.data)
+        try:
+            user.set_password(form.password.data)
+        except HashingBusy:
+            flash('The server is busy. Please try again in a moment.', 'warning')
+            return render_template('register.html', form=form), 503
         db.session.add(user)
         db.session.commit()
         
@@ -52,9 +96,21 @@ def login():
     form = LoginForm()
     
     if form.validate_on_submit():
+        if not login_limiter.allow(request.remote_addr or '', form.email.data):
+            flash('Too many login attempts. Please wait a minute and try again.', 'danger')
+            return render_template('login.html', form=form), 429
+        
         user = User.query.filter_by(email=form.email.data).first()
         
-        if user and user.check_password(form.password.data):
+        try:
+            password_ok = user is not None and user.check_password(form.password.data)
+        except HashingBusy:
+            flash('The server is busy. Please try again in a moment.', 'warning')
+            return render_template('login.html', form=form), 503
+        
+        if password_ok:
+            # Save the password hash if it was upgraded to the configured method
+            db.session.commit()
             login_user(user)
             next_page = request.args.get('next')
             flash(f'Welcome back, {user.username}!', 'success')
@@ -94,10 +150,16 @@ def expenses():
     end_date = request.args.get('end_date', '')
     sort_by = request.args.get('sort_by', 'date')
     sort_order = request.args.get('sort_order', 'desc')
+    search_term = request.args.get('q', '').strip()
+    after = request.args.get('after', '')
     
     # Get expenses
     query = Expense.query.filter_by(user_id=current_user.id)
     
+    # Apply description search
+    if search_term:
+        query = apply_search(query, search_term, current_user.id)
+    
     # Apply category filter
     if category:
         query = query.filter_by(category=category)
@@ -111,16 +173,27 @@ def expenses():
         end_date_obj = datetime.strptime(end_date, '%Y-%m-%d')
         query = query.filter(Expense.date <= end_date_obj)
     
-    # Apply sorting
-    if sort_by == 'amount':
-        query = query.order_by(Expense.amount.desc() if sort_order == 'desc' else Expense.amount)
-    elif sort_by == 'date':
-        query = query.order_by(Expense.date.desc() if sort_order == 'desc' else Expense.date)
-    elif sort_by == 'category':
-        query = query.order_by(Expense.category.desc() if sort_order == 'desc' else Expense.category)
+    # Apply sorting, with the expense id as a tie-breaker so pages are stable
+    sort_key = sort_by if sort_by in sort_columns else 'date'
+    sort_column = sort_columns[sort_key]
+    descending = sort_order == 'desc'
+    if descending:
+        query = query.order_by(sort_column.desc(), Expense.id.desc())
+    else:
+        query = query.order_by(sort_column, Expense.id)
+    
+    # Continue after the last expense of the previous page
+    cursor = decode_cursor(after, sort_key) if after else None
+    if cursor:
+        position = db.tuple_(sort_column, Expense.id)
+        query = query.filter(position < cursor if descending else position > cursor)
     
-    # Execute query
-    filtered_expenses = query.all()
+    # Execute query, fetching one extra row to know whether a next page exists
+    filtered_expenses = query.limit(EXPENSES_PER_PAGE + 1).all()
+    next_cursor = None
+    if len(filtered_expenses) > EXPENSES_PER_PAGE:
+        filtered_expenses = filtered_expenses[:EXPENSES_PER_PAGE]
+        next_cursor = encode_cursor(filtered_expenses[-1], sort_key)
     
     return render_template(
         'expenses.html',
@@ -130,7 +203,10 @@ def expenses():
         start_date=start_date,
         end_date=end_date,
         sort_by=sort_by,
-        sort_order=sort_order
+        sort_order=sort_order,
+        q=search_term,
+        is_paged=bool(cursor),
+        next_cursor=next_cursor
     )
 
 @main_bp.route('/expense/add', methods=['GET', 'POST'])
@@ -196,6 +272,62 @@ def delete_expense(expense_id):
     flash('Expense deleted successfully!', 'success')
     return redirect(url_for('main.expenses'))
 
+@main_bp.route('/recurring', methods=['GET', 'POST'])
+@login_required
+def recurring_expenses():
+    """List recurring expense rules and add new ones."""
+    form = RecurringExpenseForm()
+    form.category.choices = [(cat, cat) for cat in categories]
+    
+    if form.validate_on_submit():
+        rule = RecurringExpense(
+            amount=form.amount.data,
+            description=form.description.data,
+            category=form.category.data,
+            frequency=form.frequency.data,
+            every=form.every.data,
+            start_date=form.start_date.data,
+            end_date=form.end_date.data,
+            next_due=form.start_date.data,
+            user_id=current_user.id
+        )
+        
+        db.session.add(rule)
+        db.session.commit()
+        
+        # Record any occurrences that are already due
+        try:
+            materialize_due(user_id=current_user.id)
+        except SQLAlchemyError:
+            current_app.logger.exception("Failed to materialize recurring expense %d", rule.id)
+            flash('Recurring expense added, but its past occurrences could not be recorded yet.', 'warning')
+            return redirect(url_for('main.recurring_expenses'))
+        
+        flash('Recurring expense added successfully!', 'success')
+        return redirect(url_for('main.recurring_expenses'))
+    
+    rules = RecurringExpense.query.filter_by(user_id=current_user.id).order_by(RecurringExpense.created_at).all()
+    
+    return render_template(
+        'recurring.html',
+        form=form,
+        rules=rules,
+        frequencies=dict(FREQUENCIES)
+    )
+
+@main_bp.route('/recurring/delete/<int:rule_id>', methods=['POST'])
+@login_required
+def delete_recurring_expense(rule_id):
+    """Delete a recurring expense rule, keeping the expenses it already created."""
+    rule = RecurringExpense.query.filter_by(id=rule_id, user_id=current_user.id).first_or_404()
+    
+    RecurringOccurrence.query.filter_by(rule_id=rule.id).delete()
+    db.session.delete(rule)
+    db.session.commit()
+    
+    flash('Recurring expense deleted successfully!', 'success')
+    return redirect(url_for('main.recurring_expenses'))
+
 @main_bp.route('/api/expense-stats')
 @login_required
 def expense_stats():
@@ -218,20 +350,47 @@ def expense_stats():
         Expense.date >= start_date
     ).all()
     
-    if not expenses:
-        return jsonify({
-            'total': 0,
-            'average_per_day': 0,
-            'count': 0
-        })
-    
     total = sum(expense.amount for expense in expenses)
     days = max(1, (today - start_date).days)
     
-    return jsonify({
+    stats = {
         'total': round(total, 2),
         'average_per_day': round(total / days, 2),
         'count': len(expenses)
+    }
+    
+    # Optionally add recurring expenses still to come before the period ends
+    if request.args.get('include_projected') and period in ('week', 'month', 'year'):
+        period_start = start_date.date()
+        if period == 'week':
+            period_end = period_start + timedelta(days=6)
+        elif period == 'month':
+            period_end = add_months(period_start, 1) - timedelta(days=1)
+        else:
+            period_end = period_start.replace(month=12, day=31)
+        
+        rules = RecurringExpense.query.filter_by(user_id=current_user.id).all()
+        projected = sum(occurrence['amount'] for occurrence in project_occurrences(rules, period_end, since=period_start))
+        stats['projected_total'] = round(total + projected, 2)
+    
+    return jsonify(stats)
+
+@main_bp.route('/api/upcoming-recurring')
+@login_required
+def upcoming_recurring():
+    """API to get upcoming recurring expenses, projected without being recorded."""
+    days = max(0, min(request.args.get('days', 30, type=int), 366))
+    limit = max(0, min(request.args.get('limit', 10, type=int), 100))
+    today = datetime.now().date()
+    until = today + timedelta(days=days)
+    
+    rules = RecurringExpense.query.filter(
+        RecurringExpense.user_id == current_user.id,
+        RecurringExpense.next_due <= until
+    ).all()
+    
+    return jsonify({
+        'upcoming': list(project_occurrences(rules, until, since=today, limit=limit))
     })
 
 @main_bp.route('/api/category-breakdown')
@@ -0,0 +1,130 @@
+"""Database schema versioning module.
+
+This module records which version of the schema a database has been
+migrated to, so workers can check it with one query instead of running
+create_all() and the search index setup on every boot. Bump SCHEMA_VERSION
+whenever a change needs migrate() to run again.
+
+The deployment runs `flask --app main migrate-db` before starting
+gunicorn, so workers find the schema current in either startup mode.
+"""
+from sqlalchemy import text
+from sqlalchemy.exc import DatabaseError
+
+from extensions import db
+
+# Version of the schema defined by the models and search index
+SCHEMA_VERSION = 1
+
+# PostgreSQL advisory lock key that serializes migrations across processes
+MIGRATION_LOCK_KEY = 7402150301
+
+
+def current_version(conn):
+    """Return the schema version recorded in the database, or None if there is none."""
+    try:
+        return conn.execute(text("SELECT max(version) FROM schema_version")).scalar()
+    except DatabaseError:
+        return None
+
+
+def lock_migrations(conn):
+    """Block until no other process is migrating; the lock lasts until conn's transaction ends.
+
+    PostgreSQL uses a transaction-level advisory lock. SQLite takes the
+    database write lock up front with BEGIN IMMEDIATE, so other processes
+    wait for it (up to the driver's busy timeout) instead of racing.
+    """
+    if conn.dialect.name == 'postgresql':
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {'key': MIGRATION_LOCK_KEY})
+    elif conn.dialect.name == 'sqlite':
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def migrate():
+    """Create any missing tables and indexes and record the current schema version.
+
+    Runs in a single transaction under lock_migrations(), so workers booting
+    together against a fresh database migrate it once, one after another;
+    the others find it already at SCHEMA_VERSION. Must be called inside an
+    application context. Returns True if a migration ran.
+    """
+    from models import SchemaVersion
+    from search import init_search
+
+    versions = SchemaVersion.__table__
+    with db.engine.begin() as conn:
+        lock_migrations(conn)
+        if db.inspect(conn).has_table(versions.name) and current_version(conn) == SCHEMA_VERSION:
+            return False
+
+        db.metadata.create_all(conn)
+        init_search(conn)
+
+        conn.execute(versions.delete())
+        conn.execute(versions.insert(), {'version': SCHEMA_VERSION})
+    return True
+
+
+def migrate_if_needed():
+    """Run migrate() unless the database is already at SCHEMA_VERSION.
+
+    Must be called inside an application context. Returns True if a
+    migration ran.
+    """
+    with db.engine.connect() as conn:
+        version = current_version(conn)
+        # end the implicit transaction, which a failed query on PostgreSQL leaves aborted
+        conn.rollback()
+    if version == SCHEMA_VERSION:
+        return False
+    return migrate()
+
+
+def _check_version(dbapi_connection, connection_record):
+    """Raise if a newly opened connection's database is not at SCHEMA_VERSION."""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("SELECT max(version) FROM schema_version")
+        version = cursor.fetchone()[0]
+    except Exception:
+        version = None
+    finally:
+        cursor.close()
+    dbapi_connection.rollback()
+    if version != SCHEMA_VERSION:
+        raise RuntimeError(
+            f"Database schema is at version {version}, expected {SCHEMA_VERSION}; "
+            "run 'flask --app main migrate-db'"
+        )
+
+
+def check_on_first_connect():
+    """Verify the schema version the first time the engine opens a connection.
+
+    The check runs on first use instead of at boot, so starting a worker
+    never waits on the database. A database at the wrong version makes that
+    first use fail with a message pointing at the migrate-db command.
+    Must be called inside an application context.
+    """
+    db.event.listen(db.engine, 'first_connect', _check_version)
+
+
+def init_app(app):
+    """Register the migrate-db and rebuild-search-index CLI commands."""
+    @app.cli.command('migrate-db')
+    def migrate_db_command():
+        """Create missing tables and indexes and record the schema version."""
+        if db.event.contains(db.engine, 'first_connect', _check_version):
+            db.event.remove(db.engine, 'first_connect', _check_version)
+        if migrate():
+            print(f"Database migrated to schema version {SCHEMA_VERSION}")
+        else:
+            print(f"Database already at schema version {SCHEMA_VERSION}")
+
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index_command():
+        """Rebuild the full-text search index; run it after a VACUUM."""
+        from search import rebuild_search_index
+        rebuild_search_index()
+        print("Search index rebuilt")
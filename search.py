@@ -0,0 +1,135 @@
+"""Full-text search module.
+
+This module keeps a full-text index over expense descriptions and applies
+prefix searches to expense queries. SQLite databases use an FTS5 table kept
+in sync by triggers; PostgreSQL databases use a GIN index over a tsvector
+expression, which the server maintains on its own.
+
+The FTS5 table also indexes each expense's user id, so a search only ever
+collects the current user's matches instead of every user's. It is keyed
+on the expense table's implicit rowid, which VACUUM may renumber, so run
+`flask --app main rebuild-search-index` after vacuuming a SQLite database.
+"""
+import re
+
+from sqlalchemy import text
+
+from extensions import db
+
+# Characters that make up a search token; everything else is a separator
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+SQLITE_SCHEMA = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS expense_fts USING fts5(
+        description,
+        user_id,
+        content='expense',
+        content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS expense_fts_ai AFTER INSERT ON expense BEGIN
+        INSERT INTO expense_fts(rowid, description, user_id) VALUES (new.rowid, new.description, new.user_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS expense_fts_ad AFTER DELETE ON expense BEGIN
+        INSERT INTO expense_fts(expense_fts, rowid, description, user_id)
+        VALUES ('delete', old.rowid, old.description, old.user_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS expense_fts_au AFTER UPDATE OF description, user_id ON expense BEGIN
+        INSERT INTO expense_fts(expense_fts, rowid, description, user_id)
+        VALUES ('delete', old.rowid, old.description, old.user_id);
+        INSERT INTO expense_fts(rowid, description, user_id) VALUES (new.rowid, new.description, new.user_id);
+    END
+    """,
+]
+
+POSTGRES_SCHEMA = [
+    """
+    CREATE INDEX IF NOT EXISTS ix_expense_description_fts
+    ON expense USING GIN (to_tsvector('simple', description))
+    """,
+]
+
+
+def init_search(conn):
+    """Create the full-text index on conn's database if it is missing.
+
+    Runs in conn's transaction, after the expense table exists. Existing
+    rows are indexed the first time the SQLite index is created; after that
+    the triggers keep it in sync on add, edit and delete. The expense
+    table's own indexes are created here too, since create_all skips them
+    for tables that already exist.
+    """
+    from models import Expense
+
+    dialect = conn.dialect.name
+
+    for index in Expense.__table__.indexes:
+        index.create(conn, checkfirst=True)
+
+    if dialect == 'sqlite':
+        exists = conn.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'expense_fts'"
+        )).first()
+        for statement in SQLITE_SCHEMA:
+            conn.execute(text(statement))
+        if not exists:
+            conn.execute(text("INSERT INTO expense_fts(expense_fts) VALUES ('rebuild')"))
+    elif dialect == 'postgresql':
+        for statement in POSTGRES_SCHEMA:
+            conn.execute(text(statement))
+
+
+def rebuild_search_index():
+    """Rebuild the SQLite full-text index from the expense table.
+
+    The FTS5 index is keyed on the expense table's implicit rowid, which a
+    VACUUM may renumber, so run this after vacuuming the database.
+    """
+    if db.engine.dialect.name == 'sqlite':
+        with db.engine.begin() as conn:
+            conn.execute(text("INSERT INTO expense_fts(expense_fts) VALUES ('rebuild')"))
+
+
+def tokenize(term):
+    """Split a search term into lowercase word tokens."""
+    return [token.lower() for token in TOKEN_PATTERN.findall(term or '')]
+
+
+def apply_search(query, term, user_id):
+    """Restrict a user's expense query to descriptions matching every word in term.
+
+    Each word is matched as a prefix, so "ub" finds "Uber ride". Returns the
+    query unchanged when the term contains no words.
+    """
+    from models import Expense
+
+    tokens = tokenize(term)
+    if not tokens:
+        return query
+
+    if db.engine.dialect.name == 'postgresql':
+        ts_query = ' & '.join(f'{token}:*' for token in tokens)
+        return query.filter(
+            db.func.to_tsvector('simple', Expense.description).op('@@')(
+                db.func.to_tsquery('simple', ts_query)
+            )
+        )
+
+    if db.engine.dialect.name == 'sqlite':
+        words = ' '.join(f'"{token}"*' for token in tokens)
+        fts_query = f'user_id : "{int(user_id)}" AND description : ({words})'
+        return query.filter(text(
+            "expense.rowid IN (SELECT rowid FROM expense_fts WHERE expense_fts MATCH :fts_query)"
+        ).bindparams(fts_query=fts_query))
+
+    # Other databases have no index; fall back to a substring scan
+    for token in tokens:
+        query = query.filter(Expense.description.ilike(f'%{token}%'))
+    return query
@@ -292,6 +292,48 @@ function loadFinancialInsights() {
         });
 }
 
+/**
+ * Load upcoming recurring expenses, projected by the server without being recorded
+ */
+function loadUpcomingRecurring() {
+    const upcomingContainer = document.getElementById('upcomingRecurring');
+    
+    if (!upcomingContainer) {
+        return;
+    }
+    
+    fetch('/api/upcoming-recurring?days=30&limit=5')
+        .then(response => response.json())
+        .then(data => {
+            if (data.upcoming.length === 0) {
+                upcomingContainer.innerHTML = '<p class="text-muted mb-0">No recurring expenses due in the next 30 days.</p>';
+                return;
+            }
+            
+            upcomingContainer.innerHTML = '';
+            data.upcoming.forEach(occurrence => {
+                const item = document.createElement('div');
+                item.className = 'insight-item';
+                
+                const label = document.createElement('div');
+                label.className = 'insight-label';
+                label.textContent = `${occurrence.date} · ${occurrence.description}`;
+                
+                const value = document.createElement('div');
+                value.className = 'insight-value';
+                value.textContent = `₹${occurrence.amount.toFixed(2)}`;
+                
+                item.appendChild(label);
+                item.appendChild(value);
+                upcomingContainer.appendChild(item);
+            });
+        })
+        .catch(error => {
+            console.error('Error loading upcoming recurring expenses:', error);
+            upcomingContainer.innerHTML = '<p class="text-muted">Unable to load upcoming expenses.</p>';
+        });
+}
+
 /**
  * Load expense statistics for the dashboard
  */
@@ -329,5 +371,6 @@ document.addEventListener('DOMContentLoaded', function() {
         initDashboardCharts();
         loadFinancialInsights();
         loadExpenseStats();
+        loadUpcomingRecurring();
     }
 });
@@ -63,6 +63,9 @@ function initializeSorting() {
             params.set('sort_by', sortBy);
             params.set('sort_order', newSortOrder);
             
+            // A new sort order starts again from the first page
+            params.delete('after');
+            
             url.search = params.toString();
             window.location.href = url.toString();
         });